@@ -0,0 +1,125 @@
+import threading
+from typing import Any, Literal
+
+import numpy as np
+from PIL import Image
+
+class FrameRing:
+    """Fixed number of frame slots in one NumPy array, filled by decoder thread ahead of playback.
+
+    Frames are stored as raw RGBA pixels or palette indices ("P" mode, palette is kept per slot),
+    optionally with frame already encoded for the image widget (kept per slot too),
+    frame ``i`` is in slot ``(i + offset) % capacity`` while it is between the displayed frame and the last
+    decoded one. Seeking starts new generation of frames, the decoder must restart from the seek position.
+    Slot of the frame displayed at seek stays reserved until a frame of the new generation is taken.
+    """
+    def __init__(self, size: tuple[int, int], capacity: int, mode: Literal['RGBA', 'P'] = 'RGBA'):
+        """Create new frame ring
+
+        Args:
+            size (tuple[int, int]): Frame (width, height) in pixels
+            capacity (int): Number of frames decoded ahead
+            mode (Literal['RGBA', 'P'], optional): Frame pixels mode. Defaults to 'RGBA'.
+        """
+        self.size = size
+        self.capacity = capacity
+        self.mode = mode
+        # (slot, row, column[, channel]) - frame is one contiguous row of slots
+        self._frames = np.empty((capacity, size[1], size[0], 4) if mode == 'RGBA' else (capacity, size[1], size[0]), np.uint8)
+        self._palettes: list[list[int] | None] = [None] * capacity
+        self._encoded: list[Any] = [None] * capacity
+        self._images: list[Image.Image | None] = [None] * capacity # PIL images mapped to slots, created on first use
+        self._start = 0 # displayed frame, its slot is never overwritten
+        self._end = 0 # one after the last decoded frame
+        self._offset = 0 # slot shift of current generation
+        self._reserved: int | None = None # slot still displayed from previous generation
+        self._generation = 0
+        self._closed = False
+        self._condition = threading.Condition()
+
+    @property
+    def last_decoded(self) -> int:
+        """Index of the last decoded frame"""
+        return self._end - 1
+
+    def _slot(self, idx: int) -> int:
+        return (idx + self._offset) % self.capacity
+
+    def get(self, idx: int) -> Image.Image | None:
+        """Get decoded frame as PIL image sharing memory with the ring (None if it is not decoded yet).
+        Frames before `idx` are released for the decoder.
+
+        The same image object is returned for every frame in the slot, so it is not a frame identity."""
+        with self._condition:
+            if not self._start <= idx < self._end:
+                return None
+            if idx != self._start or self._reserved is not None:
+                self._start = idx
+                self._reserved = None
+                self._condition.notify_all()
+            slot = self._slot(idx)
+        image = self._images[slot]
+        if image is None:
+            image = self._images[slot] = Image.frombuffer(self.mode, self.size, self._frames[slot], 'raw', self.mode, 0, 1)
+        if self.mode == 'P':
+            image.putpalette(self._palettes[slot])
+        return image
+
+    def get_encoded(self, idx: int) -> Any:
+        """Get encoded frame stored with frame `idx` (call after `get`, which keeps the slot from reuse)"""
+        return self._encoded[self._slot(idx)]
+
+    def seek(self, idx: int) -> None:
+        """Drop decoded frames and start new generation from frame `idx`.
+        New generation starts in the slot after the displayed one, which is kept until next `get`"""
+        with self._condition:
+            if self._reserved is None:
+                self._reserved = self._slot(self._start)
+            self._offset = (self._reserved + 1 - idx) % self.capacity
+            self._generation += 1
+            self._start = self._end = idx
+            self._condition.notify_all()
+
+    def close(self) -> None:
+        """Stop the decoder"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def wait_seek(self, generation: int) -> tuple[int, int] | None:
+        """Decoder side: wait for generation newer than `generation`.
+
+        Returns:
+            tuple[int, int] | None: (generation, first frame index) or None if ring is closed
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._closed or self._generation != generation)
+            if self._closed:
+                return None
+            return self._generation, self._end
+
+    def put(self, generation: int, data: np.ndarray, palette: list[int] | None = None, encoded: Any = None) -> bool:
+        """Decoder side: write next frame pixels (RGBA or palette indices with palette)
+        and optionally encoded frame, blocks while ring is full.
+
+        Returns:
+            bool: False if generation is outdated (seek happened) or ring is closed
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: (
+                self._closed or self._generation != generation
+                or self._end - self._start < self.capacity - (self._reserved is not None)
+            ))
+            if self._closed or self._generation != generation:
+                return False
+            slot = self._slot(self._end)
+        # Slot is not readable until _end moves past it, so it's written outside of the lock
+        self._frames[slot] = data
+        self._palettes[slot] = palette
+        self._encoded[slot] = encoded
+        with self._condition:
+            if self._generation != generation:
+                return False
+            self._end += 1
+            self._condition.notify_all()
+        return True
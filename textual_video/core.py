@@ -1,37 +1,76 @@
 from pathlib import Path
+from typing import Generator, Iterator
 from PIL import Image
+import numpy as np
 import av
+from av.codec.hwaccel import HWAccel
 
 from .metadata import VideoMetadata
 from .enums import ImageType
 from .utils import image_type_to_widget, IMAGES_WIDGET_TYPE
 
-def _frame_to_pil(frame) -> Image.Image:
-    """Convert PyAV VideoFrame -> PIL.Image (RGB)."""
-    arr = frame.to_ndarray(format="rgb24")  # H, W, 3 (RGB)
-    return Image.fromarray(arr)
+def _frame_to_ndarray(frame, resize: tuple[int, int] | None = None, format: str = "rgb24") -> np.ndarray:
+    """Convert PyAV VideoFrame -> RGB ndarray (H, W, 3), or (H, W, 4) for "rgba" format.
+
+    Scaling is done by swscale in the same pass as the YUV -> RGB conversion,
+    so full-size RGB frames are never materialized when `resize` is given.
+    """
+    if resize:
+        return frame.to_ndarray(width=resize[0], height=resize[1], format=format, interpolation="LANCZOS")
+    return frame.to_ndarray(format=format)
+
+
+def _frame_to_pil(frame, resize: tuple[int, int] | None = None) -> Image.Image:
+    """Convert PyAV VideoFrame -> PIL.Image (RGBA, sharing memory with the decoded array)."""
+    return Image.fromarray(_frame_to_ndarray(frame, resize, "rgba"))
+
+
+def _open_video(video_path: str | Path, hw_accel: str | None = None):
+    """Open video container for decoding.
+
+    With `hw_accel` (FFmpeg device type, e.g. "cuda", "videotoolbox", "vaapi") decoding
+    is done by that device; falls back to software decoding if it is not available.
+    """
+    if hw_accel is not None:
+        try:
+            return av.open(str(video_path), hwaccel=HWAccel(device_type=hw_accel))
+        except av.error.FFmpegError:
+            pass
+    return av.open(str(video_path))
+
+
+def _get_decode_stream(container):
+    """Get first video stream of container, set up for multithreaded decoding."""
+    vs = container.streams.video[0]
+    # PyAV enables only slice threading by default; AUTO adds frame threading.
+    # thread_count = 0 lets FFmpeg pick the number of threads from CPU count.
+    vs.thread_type = "AUTO"
+    vs.thread_count = 0
+    return vs
 
 
 def frames_from_video_pyav(
     video_path: str | Path,
     resize: tuple[int, int] | None = None,
     start_sec: float = 0.0,
+    hw_accel: str | None = None,
 ) -> list[Image.Image]:
     """
     Read frames from video using PyAV and return list of PIL.Image.
 
     Args:
       video_path: path to video file
-      resize: optional (width, height) to resize each frame (PIL)
+      resize: optional (width, height) to resize each frame (swscale)
       start_sec: skip frames before this second (best-effort)
+      hw_accel: optional FFmpeg hardware device type to decode with (software fallback)
 
     Notes:
       - Sampling by target_fps is implemented by skipping frames according to
         source average rate (stream.average_rate). It's an approximation.
     """
-    container = av.open(str(video_path))
+    container = _open_video(video_path, hw_accel)
     try:
-        vs = container.streams.video[0]
+        vs = _get_decode_stream(container)
 
         src_fps = float(vs.average_rate) if vs.average_rate is not None else 15
         start_frame_idx = int(start_sec * src_fps) if (start_sec and src_fps) else 0
@@ -39,21 +78,65 @@ def frames_from_video_pyav(
         result: list[Image.Image] = []
         decoded_idx = 0  # index of decoded frames for the stream
 
-        for frame in container.decode(0):
+        for frame in container.decode(vs):
             decoded_idx += 1
             if decoded_idx < start_frame_idx:
                 continue
 
-            pil = _frame_to_pil(frame)
-            if resize:
-                pil = pil.resize(resize, Image.Resampling.LANCZOS)
-            result.append(pil)
+            result.append(_frame_to_pil(frame, resize))
 
         return result
     finally:
         container.close()
 
 
+def iter_video_frames(
+    video_path: str | Path,
+    resize: tuple[int, int] | None = None,
+    start_sec: float = 0.0,
+    step: int = 1,
+    hw_accel: str | None = None,
+    format: str = "rgba",
+) -> Generator[np.ndarray, None, float | None]:
+    """
+    Decode video frames one by one as RGBA ndarrays (H, W, 4).
+    Returns time of the last frame in the video (None if none was decoded),
+    also when it is before `start_sec`.
+
+    Args:
+      video_path: path to video file
+      resize: optional (width, height) to resize each frame (swscale)
+      start_sec: first frame time, decoding starts from the nearest keyframe before it
+      step: yield only every `step`-th frame
+      hw_accel: optional FFmpeg hardware device type to decode with (software fallback)
+      format: ndarray pixel format ("rgba" or "rgb24")
+    """
+    container = _open_video(video_path, hw_accel)
+    try:
+        vs = _get_decode_stream(container)
+
+        src_fps = float(vs.average_rate) if vs.average_rate is not None else 15
+        start_time = float((vs.start_time or 0) * vs.time_base) if vs.time_base is not None else 0.0
+        if start_sec > 0 and vs.time_base is not None:
+            container.seek(int((start_time + start_sec) / vs.time_base), stream=vs)
+        # Half a frame tolerance for timestamps rounding
+        min_time = start_time + start_sec - 0.5 / src_fps
+
+        decoded_idx = 0  # index of decoded frames since start
+        last_time = None
+        for frame in container.decode(vs):
+            if frame.time is not None:
+                last_time = frame.time - start_time
+            if start_sec > 0 and frame.time is not None and frame.time < min_time:
+                continue
+            if decoded_idx % step == 0:
+                yield _frame_to_ndarray(frame, resize, format)
+            decoded_idx += 1
+        return last_time
+    finally:
+        container.close()
+
+
 def pil_list_to_widgets(pil_list: list[Image.Image], type: ImageType, **kwargs) -> list[IMAGES_WIDGET_TYPE]:
     """Convert list of PIL.Images into list of Image instances."""
     images: list = []
@@ -78,6 +161,9 @@ def get_video_metadata(video_path: str | Path) -> VideoMetadata:
 
         # Duration in seconds (may be 0 if not available)
         duration = float((vs.duration or 0) * (vs.time_base or 0)) if vs.time_base is not None else 0.0
+        if not duration and container.duration:
+            # Some containers (mkv, webm) store duration only for the whole file
+            duration = container.duration / av.time_base
         frame_count = int(vs.frames or 0)
 
         # Prefer stream.average_rate; fall back to frame_count / duration when possible.
@@ -88,6 +174,10 @@ def get_video_metadata(video_path: str | Path) -> VideoMetadata:
         else:
             fps = 0.0
 
+        if not frame_count and fps:
+            # Estimate from duration, the player gets real count once decoder reaches the end
+            frame_count = round(duration * fps)
+
         return VideoMetadata(fps, duration, frame_count, vs.width, vs.height)
     finally:
         container.close()
@@ -98,23 +188,24 @@ def video_to_widgets(
     type: ImageType = ImageType.SIXEL,
     resize: tuple[int, int] | None = None,
     start_sec: float = 0.0,
+    hw_accel: str | None = None,
+    step: int = 1,
     **kwargs
-) -> list[IMAGES_WIDGET_TYPE]:
-    """Convert video to image widgets.
+) -> Iterator[IMAGES_WIDGET_TYPE]:
+    """Convert video to image widgets. Frames are decoded lazily, one widget at a time.
 
     Args:
         video_path (str | Path): Video path
         type (ImageType, optional): Image rendering type. Defaults to ImageType.SIXEL.
         resize (tuple[int, int] | None, optional): Resizing. Defaults to None.
         start_sec (float, optional): Start. Defaults to 0.0.
+        hw_accel (str | None, optional): FFmpeg hardware device type to decode with. Defaults to None.
+        step (int, optional): Make widget only for every `step`-th frame. Defaults to 1.
         kwargs (dict | None, optional): Keyword arguments for Image widgets. Defaults to None.
 
-    Returns:
-        list[IMAGES_WIDGET_TYPE]: Image widgets
+    Yields:
+        IMAGES_WIDGET_TYPE: Image widgets
     """
-    pil_frames = frames_from_video_pyav(
-        video_path,
-        resize=resize,
-        start_sec=start_sec,
-    )
-    return pil_list_to_widgets(pil_frames, type, **kwargs)
+    widget = image_type_to_widget(type)
+    for pixels in iter_video_frames(video_path, resize, start_sec, step, hw_accel, format="rgb24"):
+        yield widget(Image.fromarray(pixels), **kwargs)
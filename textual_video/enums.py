@@ -12,6 +12,19 @@ class ImageType(Enum):
     HALFCELL = 'Halfcell'
     UNICODE = 'Unicode'
 
+    @property
+    def render_delay(self) -> float:
+        """Average time to render an image of this type"""
+        return RENDER_DELAY[self]
+
+# Map of render delays for image types (values for Windows PowerShell, can vary in different terminals)
+RENDER_DELAY = {
+    ImageType.SIXEL: 0,#0.0373,
+    ImageType.HALFCELL: 0,#0.01065,
+    ImageType.UNICODE: 0,#0.00116,
+    ImageType.TGP: 0#0.00288
+}
+
 
 class TimeDisplayMode(Enum):
     """Time displaying mode.
@@ -0,0 +1,61 @@
+from functools import lru_cache
+
+import numpy as np
+from rich.color import Color, ColorType
+from rich.color_triplet import ColorTriplet
+from rich.console import Console, ConsoleOptions, RenderResult
+from rich.segment import Segment
+from rich.style import Style
+from textual_image._terminal import get_cell_size
+from textual_image.renderable.halfcell import Image as BaseHalfcellRenderable
+from textual_image.widget._base import Image as BaseImage
+
+from textual_video.image import FrameImage
+
+HALFCELL = '▀'
+_NEWLINE = Segment('\n')
+
+
+@lru_cache(maxsize=4096)
+def _color(rgb: int) -> Color:
+    """Get truecolor from packed 0xRRGGBB int"""
+    return Color('#%06x' % rgb, ColorType.TRUECOLOR, triplet=ColorTriplet(rgb >> 16, rgb >> 8 & 0xFF, rgb & 0xFF))
+
+
+@lru_cache(maxsize=4096)
+def _cell_style(colors: int) -> Style:
+    """Get style for cell from packed colors (upper RGB << 24 | lower RGB)"""
+    return Style.from_color(_color(colors >> 24), _color(colors & 0xFFFFFF))
+
+
+def _pack_rgb(pixels: np.ndarray) -> np.ndarray:
+    """Pack (..., 3) uint8 RGB array to (...) 0xRRGGBB ints"""
+    pixels = pixels.astype(np.int64)
+    return pixels[..., 0] << 16 | pixels[..., 1] << 8 | pixels[..., 2]
+
+
+class _HalfcellRenderable(BaseHalfcellRenderable):
+    """textual-image halfcell renderable working on whole image with NumPy.
+
+    Every cell color pair is packed into one integer, so styles are built once per
+    distinct pair and runs of equal cells are merged into one segment.
+    """
+    def __rich_console__(self, console: Console, options: ConsoleOptions) -> RenderResult:
+        width, height = self._render_size.get_cell_size(options.max_width, options.max_height, get_cell_size())
+        pixels = np.asarray(self._image_data.scaled(width, height * 2).pil_image)
+
+        packed = _pack_rgb(pixels)
+        cells = packed[0::2] << 24 | packed[1::2]
+
+        for row in cells:
+            # Start of every run of equal cells
+            starts = np.flatnonzero(np.diff(row, prepend=-1))
+            lengths = np.diff(starts, append=row.size)
+            for colors, length in zip(row[starts].tolist(), lengths.tolist()):
+                yield Segment(HALFCELL * length, _cell_style(colors))
+            yield _NEWLINE
+
+
+class HalfcellImage(FrameImage, BaseImage, Renderable=_HalfcellRenderable):
+    """Halfcell image widget with faster renderer"""
+    pass
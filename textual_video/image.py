@@ -0,0 +1,74 @@
+import zlib
+from base64 import b64encode
+
+from PIL import Image
+from textual.app import RenderResult
+from textual_image.renderable.tgp import Image as BaseTGPRenderable, _send_tgp_message
+from textual_image.renderable.unicode import Image as UnicodeRenderable
+from textual_image.widget._base import Image as BaseImage
+
+
+class FrameImage:
+    """Image widget mixin for video frames.
+
+    All frames of a video have the same size, so replacing the image with one of the same
+    size only repaints the widget instead of refreshing the whole layout.
+    """
+    @BaseImage.image.setter # type: ignore
+    def image(self, value) -> None:
+        if not (isinstance(value, Image.Image) and isinstance(self._image, Image.Image) and value.size == self._image.size):
+            BaseImage.image.fset(self, value)
+            return
+
+        # Previous renderable is cleaned up on render
+        self._image = value
+        self.refresh()
+
+
+class UnicodeImage(FrameImage, BaseImage, Renderable=UnicodeRenderable):
+    """Unicode image widget for video frames"""
+    pass
+
+
+class _TGPRenderable(BaseTGPRenderable):
+    """TGP renderable sending zlib compressed raw pixels instead of PNG (much faster to encode).
+
+    Image id of the previous frame can be reused: transmitting image with existing id replaces
+    it in terminal, so frames don't need delete messages and render to the same placeholder cells.
+    """
+    def __init__(self, image: Image.Image, width: int | str | None = None, height: int | str | None = None, image_id: int | None = None):
+        super().__init__(image, width, height)
+        self._image_id = image_id
+
+    def _send_image_to_terminal(self, width: int, height: int) -> None:
+        self.terminal_image_id = self._image_id or next(BaseTGPRenderable._image_id_counter)
+        pixels = self._image_data.scaled(width, height).pil_image.convert('RGB').tobytes()
+        image_data = b64encode(zlib.compress(pixels, 1)).decode('ascii')
+
+        # Format keys go only with the first chunk, continuation chunks carry just id and "more" flag
+        image_format = {'f': 24, 's': width, 'v': height, 'o': 'z'}
+        while image_data:
+            chunk, image_data = image_data[:4096], image_data[4096:]
+            _send_tgp_message(
+                i=self.terminal_image_id,
+                m=1 if image_data else 0,
+                **image_format,
+                payload=chunk,
+                q=2,
+            )
+            image_format = {}
+
+
+class TGPImage(FrameImage, BaseImage, Renderable=_TGPRenderable):
+    """Terminal Graphics Protocol image widget for video frames"""
+    def render(self) -> RenderResult:
+        if not self._image:
+            return ''
+
+        # New frame takes over terminal image of the previous one
+        image_id = None
+        if self._renderable:
+            image_id = self._renderable.terminal_image_id
+            self._renderable.terminal_image_id = None
+        self._renderable = _TGPRenderable(self._image, *self._get_styled_size(), image_id=image_id)
+        return self._renderable
@@ -12,10 +12,7 @@ class VideoMetadata:
         self.textual_aspect_ratio = width / (height / 2)
         self.delay_between_frames = 1 / self.fps
 
-    def decrease_fps(self, factor: int, frames: list | None) -> list | None:
+    def decrease_fps(self, factor: int) -> None:
         self.fps /= factor
         self.delay_between_frames *= factor
-        if frames != None:
-            frames = [frames[i] for i in range(0, len(frames), factor)]
-            self.frame_count = len(frames)
-            return frames
+        self.frame_count = -(-self.frame_count // factor)
@@ -1,3 +1,6 @@
+import asyncio
+import time
+from functools import partial
 from pathlib import Path
 from typing import Callable, Literal
 
@@ -5,26 +8,34 @@ from textual import on
 from textual.app import ComposeResult
 from textual.binding import Binding
 from textual.color import Color
-from textual.containers import Container, Horizontal
-from textual.css.query import NoMatches
-from textual.events import Mount, MouseDown
-from textual.geometry import Region, Size
+from textual.containers import Horizontal
+from textual.events import MouseDown, Resize
+from textual.geometry import Size
 from textual.message import Message
-from textual.reactive import reactive
 from textual.widget import Widget
 from textual.widgets import Static, LoadingIndicator
 from textual_canvas import Canvas
+from textual_image._terminal import get_cell_size
+import numpy as np
+from PIL import Image
 
-from textual_video.core import get_video_metadata, video_to_widgets
+from textual_video.buffer import FrameRing
+from textual_video.core import get_video_metadata, iter_video_frames
+from textual_video.sixel import quantize
 from textual_video.utils import (
-    get_render_delay,
-    format_time,
+    image_type_to_widget,
+    get_time_formatter,
     icon_type_to_text,
     get_track_line_width,
-    get_frame_index_from_track
+    get_frame_index_from_track,
+    CELL_WIDTH,
+    CELL_HEIGHT
 )
 from textual_video.enums import ImageType, TimeDisplayMode, IconType
 
+PREFETCH_FRAMES = 32 # frames decoded ahead of playback
+REDECODE_WIDTH_CHANGE = 0.1 # relative change of decode width at which frames are decoded again
+
 
 class PauseButton(Static):
     """Play/pause button"""
@@ -65,9 +76,6 @@ class PauseButton(Static):
             self.post_message(self.Leaved())
             self._temp_pause = False
 
-    def refresh(self, *regions: Region, repaint: bool = True, layout: bool = False, recompose: bool = False):
-        return super().refresh(*regions, repaint=repaint, layout=layout, recompose=recompose)
-
 
 
 class Track(Canvas):
@@ -82,10 +90,37 @@ class Track(Canvas):
 
         self._color = color
         self._disabled_color = disabled_color
+        self._watched = -1 # drawn watched width
 
         self.styles.width = '100%'
         self.styles.height = 1
 
+    def set_watched(self, watched: int, width: int) -> None:
+        """Draw track of given width with `watched` pixels in track color.
+        Only cells between previous and new watched width are redrawn if width is the same."""
+        previous = self._watched
+        if width == self.width and watched == previous:
+            return
+        self._watched = watched
+
+        if width != self.width or previous < 0:
+            self.clear(width=width)
+            if watched > 0:
+                self._fill_row(0, watched, self._color) # 0 to watched
+            self._fill_row(watched + int(watched != 0), width, self._disabled_color) # watched + 1 to end
+        else:
+            low, high = sorted((previous, watched))
+            color = self._color if watched > previous else self._disabled_color
+            self._fill_row(low + int(low != 0), high, color)
+        self.refresh()
+
+    def _fill_row(self, start: int, end: int, color: Color) -> None:
+        """Set track cells from `start` to `end` (inclusive, clipped to width) with one slice assignment
+        to canvas pixels instead of drawing line pixel by pixel"""
+        end = min(end + 1, self.width)
+        if start < end:
+            self._canvas[0][start:end] = [color] * (end - start)
+
     @on(MouseDown)
     def on_mouse_down(self, event: MouseDown) -> None:
         self.post_message(self.Clicked(event.x, self.size.width))
@@ -95,18 +130,13 @@ class Track(Canvas):
 class VideoPlayer(Widget):
     """Base VideoPlayer widget with embedded controls."""
 
-    frame = reactive(None)
-    paused = reactive(False)
     BINDINGS = [Binding('space', 'toggle_pause')]
     can_focus = True
 
     DEFAULT_CSS = '''
-    .player__image {
-        width: 100%;
-        height: 100%;
-    }
     .player__frame {
         width: 100%;
+        height: 1fr;
     }
     .player__controls {
         height: 1;
@@ -130,7 +160,9 @@ class VideoPlayer(Widget):
         track_disabled_color: Color = Color.parse('gray'),
         width: int | Literal['auto'] | Literal['real'] = 'auto',
         height: int | Literal['auto'] | Literal['real'] = 'auto',
-        paused: bool = False
+        paused: bool = False,
+        hw_accel: Literal['cuda', 'videotoolbox'] | str | None = None,
+        prefetch: int = PREFETCH_FRAMES
     ):
         """Create new VideoPlayer.
         For width/height - "auto" is maximum from container (given aspect ratio), "real" is real video dimension (divided by 10 for width or 20 for height) and int is your custom value.
@@ -151,39 +183,57 @@ class VideoPlayer(Widget):
             width (int | Literal['auto'] | Literal['real']): Player width. Defaults to 'auto'.
             height (int | Literal['auto'] | Literal['real']): Player height. Defaults to 'auto'.
             paused (bool): Is paused by default. Defaults to False.
+            hw_accel (str | None): FFmpeg hardware device type to decode with (e.g. 'cuda', 'videotoolbox'), software decoding is used if it is not available. Defaults to None.
+            prefetch (int): How many frames are decoded ahead of playback (memory is used only for them). Defaults to 32.
         """
         super().__init__()
         path = Path(path)
         assert path.exists(), f'Video {path} is not exists.'
         assert render_delay is None or render_delay >= 0, 'Render delay should be greater than 0.'
+        assert prefetch >= 2, 'Prefetch should be at least 2 frames.'
 
         self.video_path = path
 
         self.current_frame_index = 0
-        self.frames = []
         self.fps_decrease_factor = fps_decrease_factor
         self.speed = speed
+        self.hw_accel = hw_accel
+        self.prefetch = prefetch
         self.metadata = get_video_metadata(self.video_path)
+        if fps_decrease_factor > 1:
+            self.metadata.decrease_fps(fps_decrease_factor)
+        self.frames: FrameRing | None = None # created at first resize
         self.paused = paused
+        self._playing = asyncio.Event() # set while frames advance
         self._fake_paused = False
         self.is_loading = True # "loading" taken by textual
 
         self.image_type = image_type
         self.on_frame_update = on_update
-        self.render_delay = render_delay or get_render_delay(image_type)
+        self.render_delay = render_delay or image_type.render_delay
+        assert self.metadata.delay_between_frames / self.speed - self.render_delay > 0, (
+            f'Render delay should be less than {self.metadata.delay_between_frames / self.speed}.'
+        )
+        self._frame_period = self.metadata.delay_between_frames / self.speed
+        self._play_origin = 0.0 # monotonic time of frame 0 in current playback
         self.time_display_mode = time_display_mode
+        self._time_formatter = get_time_formatter(time_display_mode, self.metadata.fps, self.metadata.duration)
+        self._time_text = '' # shown in time display
         self.pause_icon_type = pause_icon_type
+        self._pause_icons = (icon_type_to_text(pause_icon_type, False), icon_type_to_text(pause_icon_type, True))
+        self._shown_paused = paused # state shown by pause button
         self.show_controls = show_controls
         self.show_track = show_track
         self.track_color = track_color
         self.track_disabled_color = track_disabled_color
+        self._update_controls = self._get_controls_updater() # resolved once, called every frame
 
         if width == 'real':
-            self.styles.width = self.metadata.size.width // 10
+            self.styles.width = self.metadata.size.width // CELL_WIDTH
         else:
             self.styles.width = width
         if height == 'real':
-            self.styles.height = self.metadata.size.height // 20
+            self.styles.height = self.metadata.size.height // CELL_HEIGHT
         else:
             self.styles.height = height
 
@@ -197,85 +247,229 @@ class VideoPlayer(Widget):
         return int(width / self.metadata.textual_aspect_ratio) + int(self.show_controls) + int(self.show_track) - 1
 
 
-    def on_mount(self, event: Mount):
-        self.run_worker(self._load_video, thread=True)
-
-    def _start_timer(self):
-        self.timer = self.set_interval(
-            self.metadata.delay_between_frames / self.speed - self.render_delay,
-            self._update_frame_index
-        )
-        self._replace_frame_widget(0)
+    def on_resize(self, event: Resize) -> None:
+        # Decoding waits for first layout: frames are decoded at the size the player takes on screen,
+        # and again from current frame when that size changes noticeably
+        size = self._get_decode_size(event.size.width)
+        if self.frames is None or abs(size[0] - self.frames.size[0]) > self.frames.size[0] * REDECODE_WIDTH_CHANGE:
+            self._start_decoding(size)
+        if self.show_track:
+            self._update_track()
+
+    def _start_decoding(self, size: tuple[int, int]) -> None:
+        """Create frame ring of given frame size and start decoder thread filling it from current frame"""
+        if self.frames is not None:
+            self.frames.close()
+        # Sixel is a paletted format: frames are quantized once by the decoder, not at every encode
+        mode = 'P' if self.image_type == ImageType.SIXEL else 'RGBA'
+        self.frames = FrameRing(size, self.prefetch, mode)
+        if self.current_frame_index:
+            self.frames.seek(self.current_frame_index)
+        self.run_worker(partial(self._decode_frames, self.frames), thread=True)
+
+    def _get_decode_size(self, width: int) -> tuple[int, int]:
+        """Get pixel size to decode frames at for given player width (never larger than video)"""
+        pixel_width = width * get_cell_size().width
+        if not 0 < pixel_width < self.metadata.size.width:
+            return self.metadata.size.width, self.metadata.size.height
+        return pixel_width, max(1, round(pixel_width / self.metadata.aspect_ratio))
+
+    def _start_playback(self):
+        self._rebase_playback()
+        if not self.paused:
+            self._playing.set()
+        self.run_worker(self._play_frames(), name='playback')
+        self._set_frame_image(self.frames.get(self.current_frame_index))
+        self._update_controls() # track is composed before the player has a size
+        self.on_frame_update(self.current_frame_index)
+        self._image_widget.display = True
+        self._loading_indicator.remove()
         self.is_loading = False
 
-    def _load_video(self) -> None:
-        self.frames = video_to_widgets(self.video_path, type=self.image_type, classes='player__image')
-        if self.fps_decrease_factor > 1:
-            self.frames = self.metadata.decrease_fps(self.fps_decrease_factor, self.frames) or []
-        self.log(self.metadata.delay_between_frames, self.speed, self.render_delay, self.metadata.delay_between_frames / self.speed - self.render_delay)
+    def _decode_frames(self, ring: FrameRing) -> None:
+        """Decoder thread: fill frame ring ahead of playback, restart from new position after every seek"""
+        indexed = ring.mode == 'P'
+        generation = -1
+        while (job := ring.wait_seek(generation)) is not None:
+            generation, start = job
+            frames = iter_video_frames(
+                self.video_path,
+                resize=ring.size,
+                start_sec=start * self.metadata.delay_between_frames,
+                step=self.fps_decrease_factor,
+                hw_accel=self.hw_accel,
+                format='rgb24' if indexed else 'rgba',
+            )
+            idx = start
+            while True:
+                try:
+                    data = next(frames)
+                except StopIteration as end:
+                    # Decoded to the end. Nothing decoded means seek past the end, then go by the last frame seen
+                    if idx == start and end.value is not None:
+                        idx = min(int(end.value / self.metadata.delay_between_frames) + 1, start)
+                    self.app.call_from_thread(self._end_decoded, ring, start, idx)
+                    break
+                palette = encoded = None
+                if indexed:
+                    image = quantize(Image.fromarray(data))
+                    data, palette = np.asarray(image), image.getpalette()
+                    # Sixel encoding is the slowest part of rendering, do it here instead of the UI thread
+                    encoded = self._image_widget.encode_frame(image)
+                if not ring.put(generation, data, palette, encoded):
+                    break
+                if idx == start:
+                    self.app.call_from_thread(self._show_decoded_frame, ring, idx)
+                idx += 1
+
+    def _end_decoded(self, ring: FrameRing, start: int, end: int) -> None:
+        """Decoder reached end of video: metadata frame count is only an estimate, correct it.
+        If no frame was decoded after `start`, `end` is one after the last frame the decoder saw"""
+        if ring is not self.frames:
+            return
+        if end > start:
+            self.metadata.frame_count = end
+            if self.current_frame_index >= end:
+                self._seek(end - 1)
+            self._update_controls()
+        elif start > 0 and self.current_frame_index == start:
+            # Seeked past the real last frame, go to the last one
+            self._seek(end - 1)
+
+    def _show_decoded_frame(self, ring: FrameRing, idx: int) -> None:
+        """Show first frame decoded after start or seek"""
+        if ring is not self.frames:
+            return # ring was replaced after resize
+        if self.is_loading:
+            self._start_playback()
+        elif idx == self.current_frame_index:
+            frame = self.frames.get(idx)
+            if frame is not None:
+                self._rebase_playback()
+                self._replace_frame_widget(frame)
+
+    def on_unmount(self) -> None:
+        if self.frames is not None:
+            self.frames.close()
+
+
+    def _rebase_playback(self) -> None:
+        """Count playback time from current frame (on start, resume and seek)"""
+        self._play_origin = time.monotonic() - self.current_frame_index * self._frame_period
+
+    async def _play_frames(self) -> None:
+        """Playback loop: show frame, then sleep until the next one is due by monotonic clock"""
+        while True:
+            await self._playing.wait()
+            self._update_frame_index()
+            due = self._play_origin + (self.current_frame_index + 1) * self._frame_period - self.render_delay
+            # If the frame is already due (decoder is behind), poll instead of busy looping
+            await asyncio.sleep(max(due - time.monotonic(), self._frame_period / 4))
 
-        assert self.metadata.delay_between_frames / self.speed - self.render_delay > 0, (
-            f'Render delay should be less than {self.metadata.delay_between_frames / self.speed}.'
-        )
-        self.call_next(self._start_timer)
+    def _update_frame_index(self):
+        current = self.current_frame_index
+        last = self.metadata.frame_count - 1
+        if current >= last:
+            self.pause()
+            return
 
+        # Frame due now by monotonic clock, frames in between are dropped if playback is behind
+        target = round((time.monotonic() - self._play_origin) / self._frame_period)
+        idx = min(target, last, self.frames.last_decoded)
+        if idx <= current:
+            return # tick is early or decoder is behind, keep current frame
+        frame = self.frames.get(idx)
+        if frame is None:
+            return
+        self.current_frame_index = idx
+        self._replace_frame_widget(frame)
+
+    def _replace_frame_widget(self, frame: Image.Image) -> None:
+        # Frame, controls and widgets changed by `on_frame_update` are repainted in one screen update
+        with self.app.batch_update():
+            self.on_frame_update(self.current_frame_index)
+            self._set_frame_image(frame)
+            self._update_controls()
+
+    def _set_frame_image(self, frame: Image.Image) -> None:
+        """Show current frame in image widget, with sixel data encoded by decoder if there is"""
+        if self.image_type == ImageType.SIXEL:
+            self._image_widget.set_encoded(frame, self.frames.get_encoded(self.current_frame_index))
+        else:
+            self._image_widget.image = frame
 
-    def _update_frame_index(self):
-        if self.metadata.frame_count > self.current_frame_index + 1:
-            self.current_frame_index += 1
-            self._replace_frame_widget(self.current_frame_index)
+    def _seek(self, idx: int) -> None:
+        """Go to frame `idx`. If it is not decoded yet, decoder restarts from it and shows it when ready"""
+        if idx == self.current_frame_index:
+            return
+        self.current_frame_index = idx
+        self._rebase_playback()
+        frame = self.frames.get(idx)
+        if frame is not None:
+            self._replace_frame_widget(frame)
         else:
-            self.pause()
+            self.frames.seek(idx)
+            self._update_controls()
 
-    def _replace_frame_widget(self, idx: int) -> None:
-        self.on_frame_update(self.current_frame_index)
-        self.frame = self.frames[idx]
-        self.refresh(recompose=True)
+    def _get_controls_updater(self) -> Callable[[], None]:
+        """Get method updating shown controls (track and/or time display) for current frame"""
+        if self.show_track and self.show_controls:
+            return self._update_track_and_time
+        if self.show_track:
+            return self._update_track
+        if self.show_controls:
+            return self._update_time
+        return lambda: None
+
+    def _update_track_and_time(self) -> None:
+        self._update_track()
+        self._update_time()
+
+    def _update_time(self) -> None:
+        text = self._format_time()
+        if text != self._time_text:
+            # Layout is needed only if time width changes (e.g. 0:59 -> 1:00)
+            layout = len(text) != len(self._time_text)
+            self._time_text = text
+            assert self._time_display.parent is not None, 'Controls are composed once and never remounted'
+            self._time_display.update(text, layout=layout)
+
+    def _format_time(self) -> str:
+        return self._time_formatter(self.current_frame_index)
 
     def _update_track(self)  -> None:
         assert self.show_track, 'Track is hidden'
 
         width = self.size.width
-        watched = get_track_line_width(width, self.current_frame_index, len(self.frames))
-
-        canvas = self.query_one(Track)
-        if watched > 0:
-            canvas.draw_line(0, 0, watched, 0, self.track_color) # 0 to watched
-        if watched < width:
-            canvas.draw_line(watched + int(watched != 0), 0, width, 0, self.track_disabled_color) # watched + 1 to end
-        canvas.refresh()
+        self._track.set_watched(get_track_line_width(width, self.current_frame_index, self.metadata.frame_count), width)
 
     def play(self) -> None:
         """Play/resume video"""
-        if self.is_loading:
+        if self.is_loading or not self.paused:
             return
 
-        if self.current_frame_index == self.metadata.frame_count - 1:
-            self.current_frame_index = 0 # start from the beginning
-        self.timer.resume()
-
-        if self.show_controls:
-            try:
-                self.query_one(PauseButton).update(icon_type_to_text(self.pause_icon_type, False))
-            except NoMatches:
-                self.log('No pause button found')
-
+        if self.current_frame_index >= self.metadata.frame_count - 1:
+            self._seek(0) # start from the beginning
+        self._rebase_playback()
+        self._playing.set()
         self.paused = False
+        self._update_pause_button()
 
     def pause(self) -> None:
         """Pause video"""
-        if self.is_loading:
+        if self.is_loading or self.paused:
             return
 
-        self.timer.pause()
-
-        if self.show_controls:
-            try:
-                self.query_one(PauseButton).update(icon_type_to_text(self.pause_icon_type, True))
-            except NoMatches:
-                self.log('No pause button found')
-
+        self._playing.clear()
         self.paused = True
+        self._update_pause_button()
+
+    def _update_pause_button(self) -> None:
+        """Update pause button icon if pause state changed"""
+        if self.show_controls and self.paused != self._shown_paused:
+            self._shown_paused = self.paused
+            assert self._pause_button.parent is not None, 'Controls are composed once and never remounted'
+            self._pause_button.update(self._pause_icons[self.paused], layout=False) # button has fixed size
 
     def action_toggle_pause(self) -> None:
         """Toggle pause"""
@@ -286,14 +480,15 @@ class VideoPlayer(Widget):
             self.pause()
 
     def _fake_pause(self) -> None:
-        """Fake pause - only stop timer, keep UI showing play state"""
-        self.timer.pause()
+        """Fake pause - only stop playback, keep UI showing play state"""
+        self._playing.clear()
         self._fake_paused = True
 
     def _fake_resume(self) -> None:
         """Resume from fake pause"""
         if self._fake_paused:
-            self.timer.resume()
+            self._rebase_playback()
+            self._playing.set()
             self._fake_paused = False
 
     def on_pause_button_pressed(self, event: PauseButton.Pressed) -> None:
@@ -301,7 +496,7 @@ class VideoPlayer(Widget):
         event.stop()
 
     def on_pause_button_entered(self, event: PauseButton.Entered) -> None:
-        if not self.paused:
+        if not self.paused and not self._fake_paused:
             self._fake_pause()
         event.stop()
 
@@ -312,37 +507,30 @@ class VideoPlayer(Widget):
 
 
     def on_track_clicked(self, event: Track.Clicked) -> None:
-        self.current_frame_index = get_frame_index_from_track(event.width, event.x, len(self.frames))
-        self.frame = self.frames[self.current_frame_index]
-        self._update_track()
+        self._seek(get_frame_index_from_track(event.width, event.x, self.metadata.frame_count))
         event.stop()
 
 
     def compose(self) -> ComposeResult:
-        yield Container(self.frame or LoadingIndicator(), classes='player__frame')
+        # Compose runs once: frames are shown by one image widget, hidden until the first frame
+        # (placeholder is removed then), controls stay between frames
+        self._loading_indicator = LoadingIndicator(classes='player__frame')
+        yield self._loading_indicator
+        self._image_widget = image_type_to_widget(self.image_type)(classes='player__frame player__image')
+        self._image_widget.display = False
+        yield self._image_widget
 
         if self.show_track:
-            width = self.size.width
-            watched = get_track_line_width(width, self.current_frame_index, len(self.frames))
-
-            canvas = Track(width, self.track_color, self.track_disabled_color)
-            if watched > 0:
-                canvas.draw_line(0, 0, watched, 0, self.track_color) # 0 to watched
-            if watched < width:
-                canvas.draw_line(watched + int(watched != 0), 0, width, 0, self.track_disabled_color) # watched + 1 to end
-            yield canvas
+            self._track = Track(self.size.width, self.track_color, self.track_disabled_color)
+            self._update_track()
+            yield self._track
 
         if self.show_controls:
             with Horizontal(classes='player__controls'):
-                yield PauseButton(icon_type_to_text(self.pause_icon_type, self.paused))
-
-                yield Static(
-                    format_time(
-                        self.time_display_mode,
-                        self.current_frame_index,
-                        self.metadata.fps,
-                        self.metadata.duration,
-                    ),
-                    classes='controls__time',
-                    id='time_display'
-                )
+                self._shown_paused = self.paused
+                self._pause_button = PauseButton(self._pause_icons[self.paused])
+                yield self._pause_button
+
+                self._time_text = self._format_time()
+                self._time_display = Static(self._time_text, classes='controls__time', id='time_display')
+                yield self._time_display
@@ -0,0 +1,246 @@
+import numpy as np
+from PIL import Image
+from textual.app import ComposeResult
+from textual.dom import NoScreen
+from textual.geometry import Region, Size
+from textual.strip import Strip
+from textual_image._geometry import ImageSize
+from textual_image._pixeldata import PixelData
+from textual_image._terminal import CellSize, get_cell_size
+from textual_image.widget.sixel import Image as BaseSixelImage, _CachedSixels, _ImageSixelImpl, _NoopRenderable
+
+DCS = '\x1bP'
+ST = '\x1b\\'
+COLORS = 256
+
+# Sixel without any pixel set ("?"), every other sixel is 0x3F + 6-bit column mask
+_EMPTY_SIXEL = 0x3F
+
+
+class _Prefixes:
+    """Table of all prefix tokens ("#<color>" and "!<count>") for image of given width"""
+    RUN = 1 + COLORS
+
+    def __init__(self, width: int):
+        # id 0 is no prefix, 1 + color is "#<color>", RUN + count is "!<count>"
+        tokens = [b''] + [b'#%d' % c for c in range(COLORS)] + [b'!%d' % n for n in range(width + 1)]
+        self.lengths = np.array([len(token) for token in tokens], dtype=np.int64)
+        self.offsets = np.cumsum(self.lengths) - self.lengths
+        self.data = np.frombuffer(b''.join(tokens), dtype=np.uint8)
+
+
+class _BandMasks:
+    """Reusable table of 6-bit column masks of every color for bands of given width"""
+    def __init__(self, width: int):
+        self.width = width
+        # Flat (color, column) table, last color row collects "no pixel" (-1)
+        self._table = np.zeros((COLORS + 1) * width, dtype=np.uint8)
+        self._columns = np.arange(width)
+
+    def get(self, band: np.ndarray, colors: np.ndarray) -> np.ndarray:
+        """Get (colors, width) masks of band: bit i is set if pixel in row i has the color.
+
+        Every row sets its bit at (pixel color, column), 6 scatters instead of comparing
+        whole band with every color. Used rows are cleared after, so table stays zeroed.
+        """
+        # -1 wraps around to the last color row
+        indices = band.astype(np.intp) * self.width + self._columns
+        for bit, row in enumerate(indices):
+            self._table[row] |= 1 << bit
+
+        table = self._table.reshape(-1, self.width)
+        masks = table[colors]
+        table[colors] = 0
+        table[COLORS] = 0
+        return masks
+
+
+def _ramp(lengths: np.ndarray) -> np.ndarray:
+    """Concatenated ranges [0, l0), [0, l1), ... for given lengths"""
+    starts = np.cumsum(lengths) - lengths
+    return np.arange(lengths.sum()) - np.repeat(starts, lengths)
+
+
+def _encode_band(band: np.ndarray, prefixes: _Prefixes, masks: _BandMasks) -> bytes:
+    """Encode 6-row band of palette indices (-1 is no pixel) to sixel data.
+
+    Every color present in band is one pass ("#<color>" + sixels + "$"); runs of
+    4+ equal sixels are compressed to "!<count><sixel>". The band is written as list of
+    pieces (prefix token, sixel char, char repeats) which are scattered into output at once.
+    """
+    width = band.shape[1]
+    colors = np.unique(band)
+    colors = colors[colors >= 0]
+    sixels = masks.get(band, colors) + _EMPTY_SIXEL
+
+    # Runs of equal sixels in each color row
+    change = np.empty(sixels.shape, dtype=bool)
+    change[:, 0] = True
+    np.not_equal(sixels[:, 1:], sixels[:, :-1], out=change[:, 1:])
+    rows, cols = np.nonzero(change)
+    lengths = np.diff(rows * width + cols, append=sixels.size)
+    chars = sixels[rows, cols]
+
+    # Empty sixels at the end of row are not needed
+    last = np.append(rows[1:] != rows[:-1], True)
+    keep = ~(last & (chars == _EMPTY_SIXEL))
+    rows, lengths, chars = rows[keep], lengths[keep], chars[keep]
+    first = np.insert(rows[1:] != rows[:-1], 0, True)
+    last = np.append(rows[1:] != rows[:-1], True)
+
+    # Pieces: "#<color>" before each row, runs, "$" after each row ("-" after last one)
+    count = lengths.size + 2 * colors.size
+    prefix = np.zeros(count, dtype=np.int64)
+    char = np.zeros(count, dtype=np.uint8)
+    repeats = np.zeros(count, dtype=np.int64)
+
+    pos = np.arange(lengths.size) + 2 * rows + 1
+    compressed = lengths > 3
+    prefix[pos] = np.where(compressed, _Prefixes.RUN + lengths, 0)
+    char[pos] = chars
+    repeats[pos] = np.where(compressed, 1, lengths)
+
+    prefix[pos[first] - 1] = 1 + colors
+    separators = pos[last] + 1
+    char[separators] = ord('$')
+    char[separators[-1]] = ord('-')
+    repeats[separators] = 1
+
+    prefix_lengths = prefixes.lengths[prefix]
+    sizes = prefix_lengths + repeats
+    starts = np.cumsum(sizes) - sizes
+    out = np.empty(sizes.sum(), dtype=np.uint8)
+    ramp = _ramp(prefix_lengths)
+    out[np.repeat(starts, prefix_lengths) + ramp] = prefixes.data[np.repeat(prefixes.offsets[prefix], prefix_lengths) + ramp]
+    out[np.repeat(starts + prefix_lengths, repeats) + _ramp(repeats)] = np.repeat(char, repeats)
+    return out.tobytes()
+
+
+def quantize(image: Image.Image) -> Image.Image:
+    """Quantize image to palette ("P" mode) image with sixel colors count"""
+    return image.convert('RGB').quantize(COLORS, method=Image.Quantize.FASTOCTREE)
+
+
+def image_to_sixels(image: Image.Image) -> str:
+    """Convert image to sixel data.
+
+    Drop-in replacement for textual-image encoder: quantizes with fast octree instead
+    of median cut and encodes whole 6-row bands with NumPy instead of pixel-by-pixel.
+    Palette ("P" mode) images are encoded as is.
+    """
+    if image.mode != 'P':
+        image = quantize(image)
+
+    pixels = np.asarray(image)
+    height, width = pixels.shape
+    palette = np.asarray(image.getpalette() or [], dtype=np.uint16).reshape(-1, 3) * 100 // 255
+    color_registers = ''.join(f'#{i};2;{r};{g};{b}' for i, (r, g, b) in enumerate(palette.tolist()))
+
+    # Pad height to whole bands with "no pixel"
+    bands = np.full((-(-height // 6) * 6, width), -1, dtype=np.int16)
+    bands[:height] = pixels
+    prefixes = _Prefixes(width)
+    masks = _BandMasks(width)
+    body = b''.join(_encode_band(band, prefixes, masks) for band in bands.reshape(-1, 6, width))
+
+    return f'{DCS}0;0;0q"1;1;{width};{height}{color_registers}{body.decode("ascii")}{ST}'
+
+
+# Geometry image is rendered with: crop region, content size, terminal cell size and image size in pixels
+RenderTarget = tuple[Region, Size, CellSize, tuple[int, int]]
+
+
+def encode_for_target(image: Image.Image, target: RenderTarget) -> str:
+    """Scale and crop image the way sixel widget renders it with given geometry and convert it to sixel data"""
+    crop, _, cell, pixel_size = target
+    image = image.resize(pixel_size).crop((
+        crop.x * cell.width, crop.y * cell.height, crop.right * cell.width, crop.bottom * cell.height
+    ))
+    return image_to_sixels(image)
+
+
+class _SixelImpl(_ImageSixelImpl):
+    """textual-image sixel implementation widget using `image_to_sixels` from this module.
+
+    Geometry of the last encoded render is kept in `render_target`, so next frames can be encoded
+    for it ahead of time (see `SixelImage.encode_frame`).
+    """
+    render_target: RenderTarget | None = None
+
+    def render_lines(self, crop: Region) -> list[Strip]:
+        try:
+            if not self.image or not self.screen.is_active:
+                return []
+        except NoScreen:
+            return []
+
+        terminal_sizes = get_cell_size()
+        cached = self._cached_sixels
+        # Frame is compared by identity, PIL images equality compares all pixels
+        if (
+            cached and cached.image is self.image and cached.content_crop == crop
+            and cached.content_size == self.content_size and cached.terminal_sizes == terminal_sizes
+        ):
+            sixel_data = cached.sixel_data
+        else:
+            image = self.image if isinstance(self.image, Image.Image) else PixelData(self.image).pil_image
+            target = (crop, self.content_size, terminal_sizes, self._get_pixel_size(image, terminal_sizes))
+            self.render_target = target
+            sixel_data = encode_for_target(image, target)
+            self._cached_sixels = _CachedSixels(self.image, crop, self.content_size, terminal_sizes, sixel_data)
+
+        return [Strip([])] * (crop.height - 1) + [Strip(self._get_sixel_segments(sixel_data), cell_length=crop.width)]
+
+    def _get_pixel_size(self, image: Image.Image, terminal_sizes: CellSize) -> tuple[int, int]:
+        """Get size image is scaled to before cropping (same as `_scale_image`)"""
+        styled_width, styled_height = self.parent._get_styled_size()
+        image_size = ImageSize(image.width, image.height, width=styled_width, height=styled_height)
+        return image_size.get_pixel_size(self.content_size.width, self.content_size.height, terminal_sizes)
+
+
+class SixelImage(BaseSixelImage, Renderable=_NoopRenderable):
+    """Sixel image widget with faster encoder.
+
+    Image of the same size (next video frame) is passed to the existing implementation widget,
+    which is repainted, instead of recomposing the widget. Setting image always counts as new frame,
+    even if it is the same object.
+    """
+    _impl: _SixelImpl | None = None
+
+    @BaseSixelImage.image.setter # type: ignore
+    def image(self, value) -> None:
+        impl = self._impl
+        if impl is None or not (isinstance(value, Image.Image) and isinstance(self._image, Image.Image) and value.size == self._image.size):
+            BaseSixelImage.image.fset(self, value)
+            return
+
+        self._image = value
+        impl.image = value
+        # Cached sixels are valid only for the shown frame (frames of video can be the same image object)
+        impl._cached_sixels = None
+        impl.refresh()
+
+    def encode_frame(self, image: Image.Image) -> tuple[RenderTarget, str] | None:
+        """Encode frame for geometry of the last render. Thread-safe, used by decoder thread
+        to take encoding off the UI thread.
+
+        Returns:
+            tuple[RenderTarget, str] | None: Geometry and sixel data or None if nothing is rendered yet
+        """
+        target = self._impl.render_target if self._impl is not None else None
+        if target is None:
+            return None
+        return target, encode_for_target(image, target)
+
+    def set_encoded(self, image: Image.Image, encoded: tuple[RenderTarget, str] | None) -> None:
+        """Set image with sixel data from `encode_frame`. Data is used if render geometry is still the same,
+        otherwise image is encoded on render as usual."""
+        self.image = image
+        impl = self._impl
+        if encoded is not None and impl is not None and impl.image is image:
+            (crop, content_size, terminal_sizes, _), sixel_data = encoded
+            impl._cached_sixels = _CachedSixels(image, crop, content_size, terminal_sizes, sixel_data)
+
+    def compose(self) -> ComposeResult:
+        self._impl = _SixelImpl(self.image)
+        yield self._impl
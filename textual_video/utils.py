@@ -1,36 +1,36 @@
-from textual_image.widget import SixelImage, UnicodeImage, TGPImage, HalfcellImage
+from typing import Callable
+
 from textual_video.enums import ImageType, TimeDisplayMode, IconType
+from textual_video.halfcell import HalfcellImage
+from textual_video.image import UnicodeImage, TGPImage
+from textual_video.sixel import SixelImage
 
 # Textual-image widget types
 IMAGES_WIDGET_TYPE = SixelImage | UnicodeImage | TGPImage | HalfcellImage
 
-# Map of render delays for image types (values for Windows PowerShell, can vary in different terminals)
-RENDER_DELAY = {
-    ImageType.SIXEL: 0,#0.0373,
-    ImageType.HALFCELL: 0,#0.01065,
-    ImageType.UNICODE: 0,#0.00116,
-    ImageType.TGP: 0#0.00288
+# Map of image widgets for image types
+IMAGE_WIDGETS: dict[ImageType, type[IMAGES_WIDGET_TYPE]] = {
+    ImageType.SIXEL: SixelImage,
+    ImageType.UNICODE: UnicodeImage,
+    ImageType.TGP: TGPImage,
+    ImageType.HALFCELL: HalfcellImage
 }
 
+# Size of terminal cell in pixels, used to convert textual sizes to PIL sizes and back
+CELL_WIDTH = 10
+CELL_HEIGHT = 20
+
 def textual_to_pil_sizes(width: int, height: int) -> tuple[int, int]:
     """Convert textual sizes to PIL sizes"""
-    return width * 10, height * 20
+    return width * CELL_WIDTH, height * CELL_HEIGHT
 
 def pil_to_textual_sizes(width: int, height: int) -> tuple[int, int]:
     """Convert PIL sizes to textual sizes"""
-    return width // 10, height // 20
+    return width // CELL_WIDTH, height // CELL_HEIGHT
 
 def image_type_to_widget(type: ImageType) -> type[IMAGES_WIDGET_TYPE]:
     """Get image widget from its type"""
-    match type:
-        case ImageType.SIXEL: return SixelImage
-        case ImageType.UNICODE: return UnicodeImage
-        case ImageType.TGP: return TGPImage
-        case ImageType.HALFCELL: return HalfcellImage
-
-def get_render_delay(type: ImageType) -> float:
-    """Get render delay for given image type"""
-    return RENDER_DELAY[type]
+    return IMAGE_WIDGETS[type]
 
 def _pad_left(data: float | int | str) -> str:
     if isinstance(data, (int, float)):
@@ -45,12 +45,23 @@ def format_time(mode: TimeDisplayMode, frame: int, fps: float, duration: float)
             return ''
         case TimeDisplayMode.FRAME_INDEX:
             return f'{frame}/{round(duration * fps)}'
-        case TimeDisplayMode.SECONDS:
-            return f'{frame // fps}/{round(duration)}'
         case TimeDisplayMode.MILLISECONDS:
             return f'{round(frame / fps * 60)}/{round(duration * 60)}'
+        case _:
+            return format_seconds(mode, frame_to_second(mode, frame, fps), duration)
+
+def frame_to_second(mode: TimeDisplayMode, frame: int, fps: float) -> int:
+    """Get second of frame shown in second precision modes (youtube rounds, seconds floors)"""
+    if mode == TimeDisplayMode.YOUTUBE:
+        return round(frame / fps) # "//" will not work because FPS is float value
+    return int(frame // fps)
+
+def format_seconds(mode: TimeDisplayMode, seconds: int, duration: float) -> str:
+    """Format time for second precision modes (youtube and seconds)"""
+    match mode:
+        case TimeDisplayMode.SECONDS:
+            return f'{float(seconds)}/{round(duration)}'
         case TimeDisplayMode.YOUTUBE:
-            seconds = round(frame / fps) # "//" will not work because FPS is float value
             duration = round(duration)
             if seconds < 60:
                 left = f'0:{_pad_left(seconds)}'
@@ -68,6 +79,24 @@ def format_time(mode: TimeDisplayMode, frame: int, fps: float, duration: float)
 
             return f'{left} / {right}'
 
+def get_time_formatter(mode: TimeDisplayMode, fps: float, duration: float) -> Callable[[int], str]:
+    """Get function formatting time of frame index, specialized for mode.
+    Second precision modes look up time preformatted for every second of video."""
+    match mode:
+        case TimeDisplayMode.HIDDEN:
+            return lambda frame: ''
+        case TimeDisplayMode.YOUTUBE | TimeDisplayMode.SECONDS:
+            strings = [format_seconds(mode, second, duration) for second in range(round(duration) + 2)]
+
+            def format_frame(frame: int) -> str:
+                second = frame_to_second(mode, frame, fps)
+                if second < len(strings):
+                    return strings[second]
+                return format_seconds(mode, second, duration) # duration from metadata is only estimate
+            return format_frame
+        case _:
+            return lambda frame: format_time(mode, frame, fps, duration)
+
 def icon_type_to_text(type: IconType, paused: bool = False) -> str:
     match type:
         case IconType.NERD: